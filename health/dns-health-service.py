@@ -8,42 +8,114 @@ Useful for external monitoring systems, load balancers, etc.
 Endpoints:
   GET /health - Returns aggregated health status
   GET /health/detailed - Returns detailed health check results
+                         (compact JSON; add ?pretty=1 for indented output)
   GET /ready - Kubernetes-style readiness probe
   GET /live - Kubernetes-style liveness probe
 """
 
 import sys
 import json
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
 from datetime import datetime
 import os
 
-# Import the health checker module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Make the health checker module importable; it is imported lazily so that
+# /live keeps answering even if the checker itself is broken
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from health_checker import HealthChecker
+
+
+# Shared health check results, reused by probes arriving within the cache TTL
+DEFAULT_CACHE_TTL = 2.0
+_cache = {"t": 0.0, "result": None, "ready": False, "ttl": DEFAULT_CACHE_TTL}
+_LOCK = threading.Lock()
+
+
+def is_ready(results) -> bool:
+    """Ready if at least one Pi-hole and one Unbound are working"""
+    checks = results["checks"]
+    pihole_ok = any(
+        checks.get(f"pihole_{role}", {}).get("status") == "pass"
+        for role in ["primary", "secondary"]
+    )
+    unbound_ok = any(
+        checks.get(f"unbound_{role}", {}).get("status") == "pass"
+        for role in ["primary", "secondary"]
+    )
+    return pihole_ok and unbound_ok
+
+
+def _refresh_cache():
+    """Re-run health checks if the cached results have expired (caller holds _LOCK)"""
+    if _cache["result"] is None or time.monotonic() - _cache["t"] >= _cache["ttl"]:
+        from health_checker import HealthChecker
+        checker = HealthChecker()
+        _cache["result"] = checker.run_checks()
+        _cache["ready"] = is_ready(_cache["result"])
+        _cache["t"] = time.monotonic()
+
+
+def get_health_results():
+    """Return cached health check results, re-running checks once the TTL expires"""
+    with _LOCK:
+        _refresh_cache()
+        return _cache["result"]
+
+
+def get_readiness() -> bool:
+    """Return readiness derived from the same cached results as /health"""
+    with _LOCK:
+        _refresh_cache()
+        return _cache["ready"]
+
+
+def dump_json(data, compact=False) -> bytes:
+    """Serialize data to JSON bytes (orjson when available), indented unless compact"""
+    if orjson:
+        return orjson.dumps(data) if compact else orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    if compact:
+        return json.dumps(data, separators=(",", ":")).encode()
+    return json.dumps(data, indent=2).encode()
+
+
+# Liveness body is static, so serialize it once at startup; probes only look
+# at the status code, so it carries no timestamp and no indentation
+_LIVE_BODY = dump_json({"alive": True}, compact=True)
 
 
 class HealthHandler(BaseHTTPRequestHandler):
     """HTTP request handler for health endpoints"""
     
+    # HTTP/1.1 keeps connections open between probes from the same client;
+    # idle connections are dropped after the timeout (seconds)
+    protocol_version = "HTTP/1.1"
+    timeout = 75
+    
     def do_GET(self):
         """Handle GET requests"""
+        path, _, query = self.path.partition("?")
         
-        if self.path == "/health":
+        if path == "/live":
+            self.handle_liveness()
+        elif path == "/health":
             self.handle_health_simple()
-        elif self.path == "/health/detailed":
-            self.handle_health_detailed()
-        elif self.path == "/ready":
+        elif path == "/health/detailed":
+            self.handle_health_detailed(pretty=parse_qs(query).get("pretty") == ["1"])
+        elif path == "/ready":
             self.handle_readiness()
-        elif self.path == "/live":
-            self.handle_liveness()
         else:
             self.send_error(404, "Endpoint not found")
     
     def handle_health_simple(self):
         """Simple health check - just overall status"""
-        checker = HealthChecker()
-        results = checker.run_checks()
+        results = get_health_results()
         
         status_code = 200 if results["status"] == "healthy" else 503
         
@@ -55,31 +127,17 @@ class HealthHandler(BaseHTTPRequestHandler):
         
         self.send_json_response(response, status_code)
     
-    def handle_health_detailed(self):
-        """Detailed health check - all check results"""
-        checker = HealthChecker()
-        results = checker.run_checks()
+    def handle_health_detailed(self, pretty=False):
+        """Detailed health check - all check results, compact unless pretty"""
+        results = get_health_results()
         
         status_code = 200 if results["status"] in ["healthy", "degraded"] else 503
         
-        self.send_json_response(results, status_code)
+        self.send_json_response(results, status_code, compact=not pretty)
     
     def handle_readiness(self):
         """Kubernetes-style readiness probe"""
-        checker = HealthChecker()
-        results = checker.run_checks()
-        
-        # Ready if at least one Pi-hole and one Unbound are working
-        pihole_ok = any(
-            results["checks"].get(f"pihole_{role}", {}).get("status") == "pass"
-            for role in ["primary", "secondary"]
-        )
-        unbound_ok = any(
-            results["checks"].get(f"unbound_{role}", {}).get("status") == "pass"
-            for role in ["primary", "secondary"]
-        )
-        
-        ready = pihole_ok and unbound_ok
+        ready = get_readiness()
         status_code = 200 if ready else 503
         
         response = {
@@ -90,23 +148,26 @@ class HealthHandler(BaseHTTPRequestHandler):
         self.send_json_response(response, status_code)
     
     def handle_liveness(self):
-        """Kubernetes-style liveness probe - just check if we're alive"""
-        response = {
-            "alive": True,
-            "timestamp": datetime.now().isoformat()
-        }
+        """Kubernetes-style liveness probe - just check if we're alive
         
-        self.send_json_response(response, 200)
+        Never touches the health checker, disk or sockets so a slow or
+        broken backend cannot fail liveness and trigger a restart.
+        """
+        self.send_json_body(_LIVE_BODY, 200)
     
-    def send_json_response(self, data, status_code=200):
+    def send_json_response(self, data, status_code=200, compact=False):
         """Send JSON response"""
+        self.send_json_body(dump_json(data, compact=compact), status_code)
+    
+    def send_json_body(self, body: bytes, status_code=200):
+        """Send pre-serialized JSON body"""
         self.send_response(status_code)
         self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
         self.send_header("Cache-Control", "no-cache")
         self.end_headers()
         
-        response_json = json.dumps(data, indent=2)
-        self.wfile.write(response_json.encode())
+        self.wfile.write(body)
     
     def log_message(self, format, *args):
         """Override to customize logging"""
@@ -130,11 +191,22 @@ def main():
         default="0.0.0.0",
         help="Host to bind to (default: 0.0.0.0)"
     )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=DEFAULT_CACHE_TTL,
+        help=f"Seconds to reuse health check results between probes (default: {DEFAULT_CACHE_TTL:g})"
+    )
     
     args = parser.parse_args()
     
+    _cache["ttl"] = args.cache_ttl
+    
     server_address = (args.host, args.port)
-    httpd = HTTPServer(server_address, HealthHandler)
+    # Serve each probe on its own thread so a slow check on one request
+    # does not block concurrent /live or /ready probes
+    httpd = ThreadingHTTPServer(server_address, HealthHandler)
+    httpd.daemon_threads = True
     
     print(f"Starting DNS Health HTTP Service on {args.host}:{args.port}")
     print(f"Endpoints:")
@@ -17,6 +17,7 @@ import json
 import subprocess
 import socket
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Tuple
 import os
@@ -253,43 +254,29 @@ class HealthChecker:
     def run_checks(self) -> Dict:
         """Run all health checks and return results"""
         
-        # Check Pi-hole instances
-        success, message = self.check_pihole_api(self.pihole_primary_ip, "Primary")
-        self.results["checks"]["pihole_primary"] = {
-            "status": "pass" if success else "fail",
-            "message": message
-        }
-        if not success:
-            self.results["status"] = "degraded"
-            self.results["errors"].append(f"Pi-hole Primary: {message}")
-        
-        success, message = self.check_pihole_api(self.pihole_secondary_ip, "Secondary")
-        self.results["checks"]["pihole_secondary"] = {
-            "status": "pass" if success else "fail",
-            "message": message
-        }
-        if not success:
-            self.results["status"] = "degraded"
-            self.results["errors"].append(f"Pi-hole Secondary: {message}")
+        # Pi-hole and Unbound probes are independent network I/O, so run them
+        # concurrently; total latency is that of the slowest probe, not the sum
+        probes = [
+            ("pihole_primary", "Pi-hole Primary", self.check_pihole_api, self.pihole_primary_ip, "Primary"),
+            ("pihole_secondary", "Pi-hole Secondary", self.check_pihole_api, self.pihole_secondary_ip, "Secondary"),
+            ("unbound_primary", "Unbound Primary", self.check_unbound_dns, self.unbound_primary_ip, "Primary"),
+            ("unbound_secondary", "Unbound Secondary", self.check_unbound_dns, self.unbound_secondary_ip, "Secondary"),
+        ]
+        with ThreadPoolExecutor(max_workers=len(probes)) as executor:
+            futures = [executor.submit(check, ip, name) for _, _, check, ip, name in probes]
         
-        # Check Unbound instances
-        success, message = self.check_unbound_dns(self.unbound_primary_ip, "Primary")
-        self.results["checks"]["unbound_primary"] = {
-            "status": "pass" if success else "fail",
-            "message": message
-        }
-        if not success:
-            self.results["status"] = "degraded"
-            self.results["errors"].append(f"Unbound Primary: {message}")
-        
-        success, message = self.check_unbound_dns(self.unbound_secondary_ip, "Secondary")
-        self.results["checks"]["unbound_secondary"] = {
-            "status": "pass" if success else "fail",
-            "message": message
-        }
-        if not success:
-            self.results["status"] = "degraded"
-            self.results["errors"].append(f"Unbound Secondary: {message}")
+        for (key, label, _, _, _), future in zip(probes, futures):
+            try:
+                success, message = future.result()
+            except Exception as e:
+                success, message = False, f"Check failed: {str(e)}"
+            self.results["checks"][key] = {
+                "status": "pass" if success else "fail",
+                "message": message
+            }
+            if not success:
+                self.results["status"] = "degraded"
+                self.results["errors"].append(f"{label}: {message}")
         
         # Check DNSSEC validation when smart prefetch is enabled
         if self.unbound_smart_prefetch:
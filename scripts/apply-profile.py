@@ -9,43 +9,71 @@ Usage:
     python3 apply-profile.py --profile standard
     python3 apply-profile.py --profile family --dry-run
     python3 apply-profile.py --profile paranoid --pihole-ip 192.168.8.251
+    python3 apply-profile.py --profile standard --gravity-db stacks/dns/pihole1/etc-pihole/gravity.db
 """
 
 import sys
 import os
 import argparse
 import yaml
+import sqlite3
 import subprocess
+import threading
 from typing import Dict, List
 from pathlib import Path
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     print("ERROR: requests module required. Install with: pip3 install requests")
     sys.exit(1)
 
+# Pi-hole gravity.db domainlist types
+DOMAINLIST_EXACT_WHITELIST = 0
+DOMAINLIST_REGEX_BLACKLIST = 3
+
 
 class ProfileApplicator:
     """Apply DNS security profiles to Pi-hole"""
     
-    def __init__(self, profile_path: str, pihole_ip: str = None, pihole_password: str = None, dry_run: bool = False):
+    def __init__(self, profile_path: str, pihole_ip: str = None, pihole_password: str = None, dry_run: bool = False,
+                 gravity_db: str = None):
         """Initialize profile applicator"""
         self.profile_path = profile_path
         self.pihole_ip = pihole_ip or os.getenv("PIHOLE_PRIMARY_IP", "192.168.8.251")
         self.pihole_password = pihole_password or os.getenv("PIHOLE_PASSWORD", "")
         self.dry_run = dry_run
+        # Host path of Pi-hole's gravity.db (bind-mounted /etc/pihole); when set,
+        # lists are written straight to the database instead of via docker exec
+        self.gravity_db = gravity_db or os.getenv("PIHOLE_GRAVITY_DB")
         self.profile = None
         
-        # API session
+        # API session, pooling keep-alive connections to the Pi-hole API and
+        # retrying transient connection failures with a short backoff
         self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=10,
+            max_retries=Retry(total=3, backoff_factor=0.2)
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Connection"] = "keep-alive"
         self.api_base = f"http://{self.pihole_ip}/admin/api.php"
     
     def load_profile(self) -> Dict:
         """Load profile YAML file"""
         try:
             with open(self.profile_path, 'r') as f:
-                self.profile = yaml.safe_load(f)
+                # CSafeLoader when PyYAML's C extension is available
+                self.profile = yaml.load(f, Loader=SafeLoader)
             
             print(f"✅ Loaded profile: {self.profile.get('name', 'unknown')}")
             print(f"   Description: {self.profile.get('description', 'No description')}")
@@ -88,6 +116,7 @@ class ProfileApplicator:
         blocklists = self.profile['blocklists']
         print(f"\n📋 Applying {len(blocklists)} blocklists...")
         
+        pending = []
         for i, blocklist in enumerate(blocklists, 1):
             if not blocklist.get('enabled', True):
                 print(f"   {i}. ⏭️  Skipping (disabled): {blocklist.get('name', 'unnamed')}")
@@ -105,41 +134,81 @@ class ProfileApplicator:
                 print(f"   {i}. 🔄 [DRY-RUN] Would add: {name}")
                 print(f"       URL: {url}")
             else:
-                # Add to Pi-hole via CLI or API
+                pending.append((i, name, url))
+        
+        if pending:
+            if self.gravity_db:
+                success = self._insert_into_gravity(
+                    "INSERT OR IGNORE INTO adlist (address, enabled, comment) VALUES (?, 1, ?)",
+                    [(url, name) for _, name, url in pending]
+                )
+                results = {url: success for _, _, url in pending}
+            else:
+                # Add all blocklists in a single docker exec instead of one per URL
                 # Note: Pi-hole doesn't have a direct API for adding adlists
-                # We'll use the pihole command or gravity database
-                success = self._add_blocklist_to_pihole(url, name)
-                if success:
+                results = self._add_blocklists_to_pihole([url for _, _, url in pending])
+            for i, name, url in pending:
+                if results.get(url):
                     print(f"   {i}. ✅ Added: {name}")
                 else:
                     print(f"   {i}. ❌ Failed: {name}")
         
         return True
     
-    def _add_blocklist_to_pihole(self, url: str, comment: str = "") -> bool:
-        """Add blocklist to Pi-hole gravity database"""
+    def _run_pihole_per_item(self, pihole_args: str, items: List[str], reload_lists: bool = False) -> Dict[str, bool]:
+        """Run `pihole <args> <item>` for every item inside one docker exec
+        
+        Every item is attempted and reported on its own "ok <item>" /
+        "fail <item>" line, so one failure never hides or masks another.
+        """
+        script = (
+            'for item in "$@"; do '
+            f'out=$(pihole {pihole_args} "$item" 2>&1); rc=$?; '
+            'if [ $rc -eq 0 ] || printf "%s" "$out" | grep -qi "already"; '
+            'then echo "ok $item"; else echo "fail $item"; fi; '
+            'done'
+        )
+        if reload_lists:
+            script += '; pihole restartdns reload-lists >/dev/null 2>&1'
+        cmd = ["docker", "exec", "pihole_primary", "sh", "-c", script, "sh"] + items
+        
+        results = {item: False for item in items}
+        
+        def record(output: str) -> int:
+            """Apply ok/fail status lines to results; return how many were seen"""
+            seen = 0
+            for line in output.splitlines():
+                status, _, item = line.partition(" ")
+                if item in results:
+                    results[item] = status == "ok"
+                    seen += 1
+            return seen
+        
         try:
-            # Method 1: Use sqlite directly (requires access to gravity database)
-            # This would require running on the Pi-hole host
-            
-            # Method 2: Use pihole command (preferred if available)
-            cmd = ["docker", "exec", "pihole_primary", "pihole", "-a", "-b", url]
-            
             result = subprocess.run(
                 cmd,
                 capture_output=True,
                 text=True,
-                timeout=10
+                timeout=10 * len(items)
             )
             
-            if result.returncode == 0 or "already exists" in result.stdout.lower():
-                return True
-            else:
-                print(f"       Error: {result.stderr}")
-                return False
+            record(result.stdout)
+            if result.stderr.strip():
+                print(f"       Error: {result.stderr.strip()}")
+        except subprocess.TimeoutExpired as e:
+            # Keep results for entries that finished before the timeout
+            output = e.stdout or b""
+            if isinstance(output, bytes):
+                output = output.decode(errors="replace")
+            done = record(output)
+            print(f"       Error: pihole {pihole_args} timed out after {done} of {len(items)} entries")
         except Exception as e:
-            print(f"       Error adding blocklist: {e}")
-            return False
+            print(f"       Error running pihole {pihole_args}: {e}")
+        return results
+    
+    def _add_blocklists_to_pihole(self, urls: List[str]) -> Dict[str, bool]:
+        """Add blocklists to Pi-hole gravity database in one batch"""
+        return self._run_pihole_per_item("-a -b", urls)
     
     def apply_whitelist(self) -> bool:
         """Apply whitelist from profile"""
@@ -151,6 +220,7 @@ class ProfileApplicator:
         print(f"\n✅ Applying whitelist ({len(whitelist)} categories)...")
         
         total_domains = 0
+        pending = []
         for category in whitelist:
             name = category.get('name', 'unnamed')
             domains = category.get('domains', [])
@@ -163,33 +233,31 @@ class ProfileApplicator:
                 for domain in domains:
                     print(f"       - {domain}")
             else:
-                for domain in domains:
-                    success = self._add_whitelist_to_pihole(domain)
-                    if success:
-                        print(f"   ✅ Whitelisted: {domain} ({name})")
-                    else:
-                        print(f"   ⚠️  Could not whitelist: {domain}")
+                pending.extend((domain, name) for domain in domains)
+        
+        if pending:
+            if self.gravity_db:
+                success = self._insert_into_gravity(
+                    "INSERT OR IGNORE INTO domainlist (type, domain, enabled, comment) VALUES (?, ?, 1, ?)",
+                    [(DOMAINLIST_EXACT_WHITELIST, domain, name) for domain, name in pending]
+                )
+                results = {domain: success for domain, _ in pending}
+            else:
+                # Whitelist every domain in a single docker exec
+                results = self._add_whitelist_to_pihole([domain for domain, _ in pending])
+            for domain, name in pending:
+                if results.get(domain):
+                    print(f"   ✅ Whitelisted: {domain} ({name})")
+                else:
+                    print(f"   ⚠️  Could not whitelist: {domain}")
         
         print(f"   Total domains whitelisted: {total_domains}")
         return True
     
-    def _add_whitelist_to_pihole(self, domain: str) -> bool:
-        """Add domain to Pi-hole whitelist"""
-        try:
-            # Use pihole command
-            cmd = ["docker", "exec", "pihole_primary", "pihole", "-w", domain]
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            return result.returncode == 0 or "already" in result.stdout.lower()
-        except Exception as e:
-            print(f"       Error whitelisting domain: {e}")
-            return False
+    def _add_whitelist_to_pihole(self, domains: List[str]) -> Dict[str, bool]:
+        """Add domains to Pi-hole whitelist in one batch"""
+        # Skip the per-domain list reload and reload once after the batch
+        return self._run_pihole_per_item("-w -nr", domains, reload_lists=True)
     
     def apply_regex_patterns(self) -> bool:
         """Apply regex blocking patterns"""
@@ -200,6 +268,7 @@ class ProfileApplicator:
         patterns = self.profile['regex_patterns']
         print(f"\n🔍 Applying {len(patterns)} regex patterns...")
         
+        pending = []
         for i, pattern_config in enumerate(patterns, 1):
             if not pattern_config.get('enabled', True):
                 print(f"   {i}. ⏭️  Skipping (disabled): {pattern_config.get('description', 'unnamed')}")
@@ -216,30 +285,50 @@ class ProfileApplicator:
                 print(f"   {i}. 🔄 [DRY-RUN] Would add regex: {description}")
                 print(f"       Pattern: {pattern}")
             else:
-                success = self._add_regex_to_pihole(pattern)
-                if success:
+                pending.append((i, description, pattern))
+        
+        if pending:
+            if self.gravity_db:
+                success = self._insert_into_gravity(
+                    "INSERT OR IGNORE INTO domainlist (type, domain, enabled, comment) VALUES (?, ?, 1, ?)",
+                    [(DOMAINLIST_REGEX_BLACKLIST, pattern, description) for _, description, pattern in pending]
+                )
+                results = {pattern: success for _, _, pattern in pending}
+            else:
+                # Add every pattern in a single docker exec, one writer at a time
+                results = self._add_regex_to_pihole([pattern for _, _, pattern in pending])
+            
+            for i, description, pattern in pending:
+                if results.get(pattern):
                     print(f"   {i}. ✅ Added regex: {description}")
                 else:
                     print(f"   {i}. ❌ Failed: {description}")
         
         return True
     
-    def _add_regex_to_pihole(self, pattern: str) -> bool:
-        """Add regex pattern to Pi-hole"""
+    def _add_regex_to_pihole(self, patterns: List[str]) -> Dict[str, bool]:
+        """Add regex patterns to Pi-hole in one batch"""
+        # Skip the per-pattern list reload and reload once after the batch
+        return self._run_pihole_per_item("--regex -nr", patterns, reload_lists=True)
+    
+    def _insert_into_gravity(self, sql: str, rows: List[tuple]) -> bool:
+        """Insert rows into Pi-hole's gravity database in a single transaction"""
+        if not os.path.isfile(self.gravity_db):
+            print(f"       Error: gravity database not found: {self.gravity_db}")
+            return False
+        
         try:
-            # Use pihole command with regex flag
-            cmd = ["docker", "exec", "pihole_primary", "pihole", "regex", pattern]
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            return result.returncode == 0 or "already" in result.stdout.lower()
-        except Exception as e:
-            print(f"       Error adding regex: {e}")
+            # mode=rw never creates a new, empty database on a mistyped path
+            db_uri = Path(self.gravity_db).resolve().as_uri()
+            conn = sqlite3.connect(f"{db_uri}?mode=rw", uri=True, timeout=30)
+            try:
+                with conn:
+                    conn.executemany(sql, rows)
+            finally:
+                conn.close()
+            return True
+        except sqlite3.Error as e:
+            print(f"       Error writing to gravity database: {e}")
             return False
     
     def update_gravity(self) -> bool:
@@ -253,37 +342,61 @@ class ProfileApplicator:
         try:
             cmd = ["docker", "exec", "pihole_primary", "pihole", "-g"]
             
-            result = subprocess.run(
+            # Print pihole -g progress live instead of holding all output
+            # until gravity finishes (which can take up to 5 minutes)
+            with subprocess.Popen(
                 cmd,
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
                 text=True,
-                timeout=300  # 5 minutes
-            )
+                errors="replace",
+                bufsize=1
+            ) as proc:
+                timed_out = threading.Event()
+                
+                def kill_on_timeout():
+                    timed_out.set()
+                    proc.kill()
+                
+                timer = threading.Timer(300, kill_on_timeout)  # 5 minutes
+                timer.start()
+                try:
+                    for line in proc.stdout:
+                        line = line.rstrip()
+                        if line:
+                            print(f"   {line}", flush=True)
+                    returncode = proc.wait()
+                except BaseException:
+                    # Never leave gravity running unsupervised past an error
+                    proc.kill()
+                    raise
+                finally:
+                    timer.cancel()
             
-            if result.returncode == 0:
+            if timed_out.is_set():
+                print("❌ Gravity update timed out")
+                return False
+            elif returncode == 0:
                 print("✅ Gravity update completed successfully")
                 return True
             else:
-                print(f"❌ Gravity update failed: {result.stderr}")
+                print(f"❌ Gravity update failed (exit code {returncode})")
                 return False
-        except subprocess.TimeoutExpired:
-            print("❌ Gravity update timed out")
-            return False
         except Exception as e:
             print(f"❌ Error updating gravity: {e}")
             return False
     
     def apply_profile(self) -> bool:
         """Apply the complete profile"""
+        # Load profile
+        self.load_profile()
+        
         print("\n" + "="*60)
         print(f"Applying Profile: {self.profile.get('name', 'unknown')}")
         print(f"Target Pi-hole: {self.pihole_ip}")
         print(f"Mode: {'DRY-RUN (no changes)' if self.dry_run else 'LIVE'}")
         print("="*60)
         
-        # Load profile
-        self.load_profile()
-        
         # Verify API access
         if not self.dry_run:
             if not self.verify_pihole_api():
@@ -333,6 +446,10 @@ def main():
         action="store_true",
         help="Show what would be done without making changes"
     )
+    parser.add_argument(
+        "--gravity-db",
+        help="Path to Pi-hole's gravity.db to write lists directly (default: from PIHOLE_GRAVITY_DB env, else use docker exec)"
+    )
     
     args = parser.parse_args()
     
@@ -347,8 +464,10 @@ def main():
         print(f"❌ ERROR: Profile not found: {profile_path}")
         print("\nAvailable profiles:")
         script_dir = Path(__file__).parent
-        for profile_file in script_dir.glob("*.yml"):
-            print(f"  - {profile_file.stem}")
+        with os.scandir(script_dir) as entries:
+            names = [e.name[:-4] for e in entries if e.name.endswith('.yml') and e.is_file()]
+        for name in names:
+            print(f"  - {name}")
         sys.exit(1)
     
     # Create applicator and run
@@ -356,7 +475,8 @@ def main():
         profile_path=str(profile_path),
         pihole_ip=args.pihole_ip,
         pihole_password=args.pihole_password,
-        dry_run=args.dry_run
+        dry_run=args.dry_run,
+        gravity_db=args.gravity_db
     )
     
     success = applicator.apply_profile()
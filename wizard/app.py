@@ -15,17 +15,38 @@ Built with Flask and Jinja2 templates for simplicity.
 """
 
 from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask.json.provider import DefaultJSONProvider
+import functools
 import os
 import sys
+import socket
 import subprocess
 import re
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 import bcrypt  # For secure password hashing
 from cryptography.fernet import Fernet  # For encrypting VRRP password
 
+try:
+    import orjson  # Faster JSON serialization for jsonify()
+except ImportError:
+    orjson = None
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson."""
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
 app.secret_key = os.urandom(24)
+if orjson:
+    app.json = ORJSONProvider(app)
 
 # Constants
 VALID_NODE_ROLES = ['primary', 'secondary']
@@ -42,6 +63,9 @@ SETUP_DONE_FILE = REPO_ROOT / "wizard" / ".setup_done"
 PROFILES_DIR = REPO_ROOT / "profiles"
 APPLY_PROFILE_SCRIPT = REPO_ROOT / "scripts" / "apply-profile.py"
 
+# Interface name in `ip route show default` output
+IFACE_RE = re.compile(r'dev\s+(\S+)')
+
 
 def is_setup_done() -> bool:
     """Check if initial setup has been completed."""
@@ -57,24 +81,41 @@ def mark_setup_done():
 
 def detect_pi_ip() -> str:
     """Detect the Pi's primary IP address."""
+    # Ask the kernel which source address it would use for an outbound route;
+    # UDP connect needs no DNS and sends no packets
     try:
-        result = subprocess.run(
-            ['hostname', '-I'],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        if result.returncode == 0:
-            ips = result.stdout.strip().split()
-            if ips:
-                return ips[0]  # Return first IP
-    except Exception:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.connect(('192.0.2.1', 53))
+            ip = sock.getsockname()[0]
+            if not ip.startswith('127.') and ip != '0.0.0.0':
+                return ip
+    except OSError:
+        pass
+    
+    # No usable route: fall back to resolving our own hostname
+    try:
+        for info in socket.getaddrinfo(socket.gethostname(), None, socket.AF_INET):
+            ip = info[4][0]
+            if not ip.startswith('127.'):
+                return ip
+    except OSError:
         pass
     return "192.168.1.100"  # Fallback default
 
 
 def detect_interface() -> str:
     """Detect the primary network interface."""
+    # Fast path: the default route is the 00000000 destination in /proc/net/route
+    try:
+        with open('/proc/net/route', 'r') as f:
+            next(f)  # Skip header
+            for line in f:
+                fields = line.split()
+                if len(fields) > 1 and fields[1] == '00000000':
+                    return fields[0]
+    except (OSError, StopIteration):
+        pass
+    
     try:
         result = subprocess.run(
             ['ip', 'route', 'show', 'default'],
@@ -84,8 +125,14 @@ def detect_interface() -> str:
         )
         if result.returncode == 0:
             # Parse: default via 192.168.1.1 dev eth0 proto dhcp src 192.168.1.100 metric 100
-            match = re.search(r'dev\s+(\S+)', result.stdout)
+            match = IFACE_RE.search(result.stdout)
             if match:
+                return match.group(1)
+    except Exception:
+        pass
+    return "eth0"  # Fallback default
+
+
 def load_or_create_fernet_key() -> bytes:
     """
     Loads the Fernet key from disk, or creates a new one if it doesn't exist.
@@ -100,11 +147,6 @@ def load_or_create_fernet_key() -> bytes:
             key = f.read()
     return key
 
-                return match.group(1)
-    except Exception:
-        pass
-    return "eth0"  # Fallback default
-
 
 def update_env_file(config: Dict[str, str]) -> bool:
     """
@@ -128,24 +170,33 @@ def update_env_file(config: Dict[str, str]) -> bool:
             # Create minimal .env if neither exists
             env_content = ""
         
+        # Index existing KEY=value lines once, keeping comments and blanks in place
+        lines = env_content.splitlines()
+        key_lines: Dict[str, List[int]] = {}
+        for i, line in enumerate(lines):
+            key, sep, _ = line.partition('=')
+            if sep and not line.startswith('#'):
+                key_lines.setdefault(key, []).append(i)
+        
         # Update or add each configuration value
         for key, value in config.items():
             # Escape special characters in value
             safe_value = str(value).replace('"', '\\"')
+            entry = f'{key}="{safe_value}"'
             
-            # Check if key exists in content
-            pattern = re.compile(rf'^{re.escape(key)}=.*$', re.MULTILINE)
-            if pattern.search(env_content):
+            if key in key_lines:
                 # Replace existing value
-                env_content = pattern.sub(f'{key}="{safe_value}"', env_content)
+                for i in key_lines[key]:
+                    lines[i] = entry
             else:
                 # Add new key=value
-                env_content += f'\n{key}="{safe_value}"'
+                key_lines[key] = [len(lines)]
+                lines.append(entry)
         
         # Write updated content
         ENV_FILE.parent.mkdir(parents=True, exist_ok=True)
         with open(ENV_FILE, 'w') as f:
-            f.write(env_content)
+            f.write('\n'.join(lines) + '\n')
         
         return True
     except Exception as e:
@@ -153,6 +204,27 @@ def update_env_file(config: Dict[str, str]) -> bool:
         return False
 
 
+@functools.lru_cache(maxsize=1)
+def _parse_env(mtime_ns: int) -> Dict[str, str]:
+    """Parse .env into a dict; cached per file modification time."""
+    config = {}
+    with open(ENV_FILE, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if '=' in line and not line.startswith('#'):
+                key, value = line.split('=', 1)
+                config[key] = value.strip('"').strip("'")
+    return config
+
+
+def read_env_config() -> Dict[str, str]:
+    """Return the current .env values, re-parsing only when the file changes."""
+    try:
+        return _parse_env(ENV_FILE.stat().st_mtime_ns)
+    except Exception:
+        return {}
+
+
 @app.route('/')
 def index():
     """Main router - redirect to welcome or setup_complete based on status."""
@@ -342,17 +414,7 @@ def api_profile():
 def setup_complete():
     """Setup completion page with next steps."""
     # Read configuration to show user
-    config = {}
-    if ENV_FILE.exists():
-        try:
-            with open(ENV_FILE, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if '=' in line and not line.startswith('#'):
-                        key, value = line.split('=', 1)
-                        config[key] = value.strip('"').strip("'")
-        except Exception:
-            pass
+    config = read_env_config()
     
     dns_ip = config.get('DNS_VIP', config.get('VIP_ADDRESS', 'your-dns-ip'))
     pihole_ip = config.get('PRIMARY_DNS_IP', dns_ip)
@@ -390,6 +452,13 @@ def api_reapply_profile():
         return jsonify({'success': False, 'error': 'Internal server error'}), 500
 
 
+@app.route('/health')
+def health():
+    """Lightweight health endpoint for container and uptime probes."""
+    return jsonify({'status': 'ok'})
+
+
 if __name__ == '__main__':
-    # Run on all interfaces, port 5555 for consistency
-    app.run(host='0.0.0.0', port=5555, debug=False)
+    # Run on all interfaces, port 5555 for consistency; handle each request on
+    # its own thread so a slow endpoint never blocks /health or page loads
+    app.run(host='0.0.0.0', port=5555, debug=False, threaded=True)